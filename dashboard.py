@@ -6,6 +6,7 @@ import seaborn as sns
 from PIL import Image
 import io
 import os
+import json
 from sklearn.metrics import confusion_matrix
 import pickle
 
@@ -51,6 +52,18 @@ def load_test_data():
         st.warning(f"Could not load test data: {e}")
         return None, None
 
+@st.cache_data
+def load_profile_report():
+    """Load the layer profiling report written by profile_model.py"""
+    try:
+        with open("output/model_profile.json") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        st.warning(f"Could not load profiling report: {e}")
+        return None
+
 def predict_image(model, img):
     """Make prediction on a single image"""
     img = img.resize((32, 32))
@@ -114,7 +127,62 @@ def main():
         model.summary(print_fn=lambda x: stringlist.append(x))
         model_summary = "\n".join(stringlist)
         st.text(model_summary)
-    
+
+        st.subheader("Layer Profile")
+        profile = load_profile_report()
+        if profile is None:
+            st.info("No profiling report found. Run `python profile_model.py` to generate it.")
+        else:
+            batch_sizes = [str(b) for b in profile["batch_sizes"]]
+            batch_size = st.selectbox("Batch size", batch_sizes, index=len(batch_sizes) - 1)
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total FLOPs / image", f"{profile['total_flops'] / 1e6:.1f} M")
+            with col2:
+                st.metric("Parameters", f"{profile['total_params']:,}")
+            with col3:
+                st.metric("Forward pass", f"{profile['optimization']['original_ms'][batch_size]:.2f} ms")
+
+            st.dataframe([{
+                "Layer": row["name"],
+                "Type": row["type"],
+                "Output Shape": str(tuple(row["output_shape"])),
+                "Params": row["params"],
+                "Param KB": round(row["param_bytes"] / 1024, 1),
+                "Activation KB / image": round(row["activation_bytes"] / 1024, 1),
+                "MFLOPs / image": round(row["flops"] / 1e6, 2),
+                "Time (ms)": round(row["time_ms"][batch_size], 3),
+                "Time Share": f"{row['time_share'][batch_size]:.1%}",
+            } for row in profile["layers"]])
+
+            fig, ax = plt.subplots(figsize=(10, 6))
+            ax.barh([row["name"] for row in profile["layers"]],
+                    [row["time_ms"][batch_size] for row in profile["layers"]])
+            ax.invert_yaxis()
+            ax.set_xlabel('Time (ms)')
+            ax.set_title(f'Per-Layer Inference Time (batch size {batch_size})')
+            st.pyplot(fig)
+
+            st.subheader("Inference Optimization")
+            optimization = profile["optimization"]
+            parity = optimization["parity"]
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Folded model", f"{optimization['folded_ms'][batch_size]:.2f} ms",
+                          f"{optimization['speedup'][batch_size]:.2f}x")
+            with col2:
+                st.metric("Max output difference", f"{parity['max_abs_diff']:.2e}")
+            with col3:
+                st.metric("Prediction agreement", f"{parity['argmax_agreement']:.2%}")
+
+            if optimization["exported_path"]:
+                st.success(f"Parity check passed. Folded model saved to {optimization['exported_path']}")
+            else:
+                st.warning("Parity check failed. The folded model was not exported.")
+            st.table([{"Layer": c["layer"], "Action": c["action"], "Detail": c["detail"]}
+                      for c in optimization["changes"]])
+
     elif page == "Image Prediction":
         st.header("🔍 Image Classification")
         
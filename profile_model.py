@@ -0,0 +1,363 @@
+"""
+Profile the CNN Layer by Layer
+This script loads the saved model, times every layer across several batch
+sizes and reports FLOPs, parameter memory and activation memory per layer.
+It also tries an inference-only rewrite (BatchNormalization folded into an
+adjacent Conv2D/Dense, Dropout removed), checks it against the original
+model and exports it if the outputs match.
+"""
+
+import os
+import json
+import time
+import pickle
+import numpy as np
+import tensorflow as tf
+
+# Create output directory
+os.makedirs('output', exist_ok=True)
+
+MODEL_PATH = "model/image_classifier_clean.keras"
+FOLDED_MODEL_PATH = "model/image_classifier_folded.keras"
+REPORT_PATH = "output/model_profile.json"
+
+BATCH_SIZES = [1, 8, 32, 128]
+WARMUP_RUNS = 3
+TIMED_RUNS = 20
+
+# Largest absolute difference in class probabilities allowed between the
+# original and the folded model
+PARITY_TOLERANCE = 1e-4
+
+
+def load_parity_inputs(n_samples=256):
+    """Load CIFAR-10 test images for the parity check, random data otherwise"""
+    try:
+        with open('data/cifar-10-batches-py/test_batch', 'rb') as fo:
+            test_batch = pickle.load(fo, encoding='bytes')
+        X_test = test_batch[b'data'][:n_samples].reshape(-1, 3, 32, 32).transpose(0, 2, 3, 1)
+        return (X_test / 255.0).astype('float32')
+    except Exception as e:
+        print(f"[WARNING] Could not load test data, using random inputs: {e}")
+        rng = np.random.default_rng(0)
+        return rng.random((n_samples, 32, 32, 3), dtype='float32')
+
+
+def _per_sample_shape(shape):
+    """Drop the batch dimension from a Keras shape tuple"""
+    return tuple(int(d) for d in shape[1:])
+
+
+def layer_flops(layer, input_shape, output_shape):
+    """Estimate inference FLOPs of one layer for a single sample.
+
+    A multiply-accumulate counts as two FLOPs. Element-wise activations
+    are not counted.
+    """
+    out_elems = int(np.prod(output_shape))
+
+    if isinstance(layer, tf.keras.layers.Conv2D):
+        kh, kw = layer.kernel_size
+        c_in = input_shape[-1] // layer.groups
+        flops = 2 * out_elems * kh * kw * c_in
+        if layer.use_bias:
+            flops += out_elems
+        return flops
+
+    if isinstance(layer, tf.keras.layers.Dense):
+        flops = 2 * int(np.prod(input_shape)) * layer.units
+        if layer.use_bias:
+            flops += out_elems
+        return flops
+
+    if isinstance(layer, tf.keras.layers.BatchNormalization):
+        # Scale and shift per element at inference
+        return 2 * out_elems
+
+    if isinstance(layer, (tf.keras.layers.MaxPooling2D, tf.keras.layers.AveragePooling2D)):
+        ph, pw = layer.pool_size
+        return out_elems * (ph * pw - 1)
+
+    # Dropout, Flatten, Reshape, ... move data but do no arithmetic
+    return 0
+
+
+def _time_fn(fn, x):
+    """Median wall time of fn(x) in milliseconds"""
+    for _ in range(WARMUP_RUNS):
+        fn(x)
+    times = []
+    for _ in range(TIMED_RUNS):
+        start = time.perf_counter()
+        out = fn(x)
+        # Force the computation to finish before stopping the clock
+        np.asarray(out)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def _compiled_forward(model_or_layer):
+    """Wrap a model or layer call in a tf.function running in inference mode"""
+    return tf.function(lambda t: model_or_layer(t, training=False))
+
+
+def time_model(model, batch_sizes=BATCH_SIZES):
+    """Time the full forward pass of a model for each batch size"""
+    input_shape = _per_sample_shape(model.input_shape)
+    forward = _compiled_forward(model)
+    timings = {}
+    for batch_size in batch_sizes:
+        x = tf.random.uniform((batch_size,) + input_shape)
+        timings[str(batch_size)] = _time_fn(forward, x)
+    return timings
+
+
+def profile_layers(model, batch_sizes=BATCH_SIZES):
+    """Collect cost figures and timings for every layer of a sequential model.
+
+    Each layer is timed on its own, fed with the real activations of the
+    layer before it, so the per-layer times include one dispatch overhead
+    each and add up to slightly more than the full forward pass.
+    """
+    input_shape = _per_sample_shape(model.input_shape)
+    rows = []
+    for layer in model.layers:
+        in_shape = _per_sample_shape(layer.input.shape)
+        out_shape = _per_sample_shape(layer.output.shape)
+        param_bytes = sum(int(np.prod(w.shape)) * np.dtype(w.dtype).itemsize
+                          for w in layer.weights)
+        rows.append({
+            "name": layer.name,
+            "type": layer.__class__.__name__,
+            "output_shape": list(out_shape),
+            "params": int(layer.count_params()),
+            "param_bytes": param_bytes,
+            # float32 activations for a single sample
+            "activation_bytes": int(np.prod(out_shape)) * 4,
+            "flops": layer_flops(layer, in_shape, out_shape),
+            "time_ms": {},
+        })
+
+    for batch_size in batch_sizes:
+        x = tf.random.uniform((batch_size,) + input_shape)
+        for layer, row in zip(model.layers, rows):
+            forward = _compiled_forward(layer)
+            row["time_ms"][str(batch_size)] = _time_fn(forward, x)
+            x = forward(x)
+
+    total_time = {str(b): sum(r["time_ms"][str(b)] for r in rows) for b in batch_sizes}
+    for row in rows:
+        row["time_share"] = {b: (row["time_ms"][b] / t if t else 0.0)
+                             for b, t in total_time.items()}
+    return rows
+
+
+def _bn_affine(bn):
+    """Return the per-channel (scale, shift) a BatchNormalization applies at inference"""
+    mean = bn.moving_mean.numpy()
+    var = bn.moving_variance.numpy()
+    gamma = bn.gamma.numpy() if bn.scale else np.ones_like(mean)
+    beta = bn.beta.numpy() if bn.center else np.zeros_like(mean)
+    scale = gamma / np.sqrt(var + bn.epsilon)
+    shift = beta - mean * scale
+    return scale, shift
+
+
+def _kernel_and_bias(layer):
+    """Return copies of the kernel and bias of a Conv2D/Dense layer"""
+    kernel = layer.kernel.numpy().copy()
+    if layer.use_bias:
+        bias = layer.bias.numpy().copy()
+    else:
+        bias = np.zeros(kernel.shape[-1], dtype=kernel.dtype)
+    return kernel, bias
+
+
+def _fold_target(layers, i):
+    """Decide where the BatchNormalization at layers[i] can be folded.
+
+    Returns ("previous", index), ("next", index) or (None, reason). Folding
+    is only done where the rewritten model is mathematically identical.
+    """
+    bn = layers[i]
+    if bn.axis not in (-1, len(bn.input.shape) - 1):
+        return None, "normalizes a non-channel axis"
+
+    prev = layers[i - 1] if i > 0 else None
+    if isinstance(prev, (tf.keras.layers.Conv2D, tf.keras.layers.Dense)) and \
+            prev.activation.__name__ == "linear":
+        return "previous", i - 1
+
+    # Otherwise push the affine transform forward into the next layer, across
+    # Dropout which is the identity at inference
+    j = i + 1
+    while j < len(layers) and isinstance(layers[j], tf.keras.layers.Dropout):
+        j += 1
+    nxt = layers[j] if j < len(layers) else None
+    if isinstance(nxt, tf.keras.layers.Dense) and len(nxt.input.shape) == 2:
+        return "next", j
+    if isinstance(nxt, tf.keras.layers.Conv2D) and nxt.padding == "valid" and nxt.groups == 1:
+        return "next", j
+
+    if isinstance(prev, (tf.keras.layers.Conv2D, tf.keras.layers.Dense)):
+        reason = f"{prev.name} applies '{prev.activation.__name__}' before the normalization"
+    else:
+        reason = f"follows {prev.__class__.__name__ if prev else 'the input'}"
+    if nxt is not None:
+        reason += f" and the next layer ({nxt.name}) cannot absorb it"
+    return None, reason
+
+
+def build_folded_model(model):
+    """Build an inference-only copy of a sequential model.
+
+    BatchNormalization layers are folded into an adjacent Conv2D/Dense where
+    that is exact and Dropout layers are dropped. Returns the new model and
+    a list describing what happened to every BatchNormalization and Dropout.
+    """
+    if not isinstance(model, tf.keras.Sequential):
+        raise ValueError("Folding is only supported for Sequential models")
+
+    layers = model.layers
+    # Weights overrides and layers to skip, keyed by layer index
+    new_weights = {}
+    skipped = set()
+    changes = []
+
+    for i, layer in enumerate(layers):
+        if isinstance(layer, tf.keras.layers.Dropout):
+            skipped.add(i)
+            changes.append({"layer": layer.name, "action": "removed",
+                            "detail": "Dropout is the identity at inference"})
+            continue
+        if not isinstance(layer, tf.keras.layers.BatchNormalization):
+            continue
+
+        direction, target = _fold_target(layers, i)
+        if direction is None:
+            changes.append({"layer": layer.name, "action": "kept", "detail": target})
+            continue
+
+        scale, shift = _bn_affine(layer)
+        kernel, bias = new_weights.get(target) or _kernel_and_bias(layers[target])
+        if direction == "previous":
+            kernel = kernel * scale
+            bias = bias * scale + shift
+        elif isinstance(layers[target], tf.keras.layers.Dense):
+            bias = bias + shift @ kernel
+            kernel = kernel * scale[:, None]
+        else:
+            # Conv2D kernel layout is (kh, kw, c_in, c_out)
+            bias = bias + np.einsum("hwio,i->o", kernel, shift)
+            kernel = kernel * scale[None, None, :, None]
+        new_weights[target] = (kernel, bias)
+        skipped.add(i)
+        changes.append({"layer": layer.name, "action": "folded",
+                        "detail": f"folded into {layers[target].name}"})
+
+    folded = tf.keras.Sequential(name=f"{model.name}_folded")
+    folded.add(tf.keras.Input(shape=_per_sample_shape(model.input_shape)))
+    for i, layer in enumerate(layers):
+        if i in skipped:
+            continue
+        config = layer.get_config()
+        if i in new_weights:
+            config["use_bias"] = True
+        new_layer = layer.__class__.from_config(config)
+        folded.add(new_layer)
+        if i in new_weights:
+            new_layer.set_weights(list(new_weights[i]))
+        else:
+            new_layer.set_weights(layer.get_weights())
+    return folded, changes
+
+
+def check_parity(model, folded, x, tolerance=PARITY_TOLERANCE):
+    """Compare the outputs of two models on the same inputs"""
+    expected = model.predict(x, verbose=0)
+    actual = folded.predict(x, verbose=0)
+    max_abs_diff = float(np.max(np.abs(expected - actual)))
+    argmax_agreement = float((expected.argmax(axis=1) == actual.argmax(axis=1)).mean())
+    return {
+        "samples": int(len(x)),
+        "max_abs_diff": max_abs_diff,
+        "argmax_agreement": argmax_agreement,
+        "tolerance": tolerance,
+        "passed": max_abs_diff <= tolerance,
+    }
+
+
+def main():
+    print("=" * 50)
+    print("Model Layer Profiling")
+    print("=" * 50)
+
+    # Load model
+    print("\n[*] Loading model...")
+    try:
+        model = tf.keras.models.load_model(MODEL_PATH)
+        print("[OK] Model loaded successfully")
+    except Exception as e:
+        print(f"[ERROR] Could not load model: {e}")
+        return
+
+    # Per-layer costs
+    print(f"\n[*] Profiling layers for batch sizes {BATCH_SIZES}...")
+    layers = profile_layers(model)
+    largest = str(BATCH_SIZES[-1])
+    print(f"\n{'Layer':<24}{'Type':<20}{'Params':>10}{'MFLOPs':>10}{'Act KB':>10}{'ms@' + largest:>10}")
+    for row in layers:
+        print(f"{row['name']:<24}{row['type']:<20}{row['params']:>10,}"
+              f"{row['flops'] / 1e6:>10.2f}{row['activation_bytes'] / 1024:>10.1f}"
+              f"{row['time_ms'][largest]:>10.3f}")
+
+    # Inference-only rewrite
+    print("\n[*] Folding BatchNormalization and removing Dropout...")
+    folded, changes = build_folded_model(model)
+    for change in changes:
+        print(f"   - {change['layer']}: {change['action']} ({change['detail']})")
+
+    parity = check_parity(model, folded, load_parity_inputs())
+    print(f"[{'OK' if parity['passed'] else 'WARNING'}] Parity: max abs diff "
+          f"{parity['max_abs_diff']:.2e}, argmax agreement {parity['argmax_agreement']:.2%}")
+
+    print("\n[*] Timing original and folded models...")
+    original_ms = time_model(model)
+    folded_ms = time_model(folded)
+    speedup = {b: original_ms[b] / folded_ms[b] for b in original_ms}
+    for b in original_ms:
+        print(f"   batch {b:>4}: {original_ms[b]:8.3f} ms -> {folded_ms[b]:8.3f} ms ({speedup[b]:.2f}x)")
+
+    exported = None
+    if parity["passed"]:
+        folded.save(FOLDED_MODEL_PATH)
+        exported = FOLDED_MODEL_PATH
+        print(f"[OK] Saved folded model to {FOLDED_MODEL_PATH}")
+    else:
+        print("[WARNING] Folded model does not match the original, not exporting it")
+
+    report = {
+        "model_path": MODEL_PATH,
+        "batch_sizes": BATCH_SIZES,
+        "total_params": int(model.count_params()),
+        "total_flops": int(sum(r["flops"] for r in layers)),
+        "layers": layers,
+        "optimization": {
+            "changes": changes,
+            "parity": parity,
+            "original_ms": original_ms,
+            "folded_ms": folded_ms,
+            "speedup": speedup,
+            "exported_path": exported,
+        },
+    }
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 50)
+    print(f"[SUCCESS] Profile written to {REPORT_PATH}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import pytest
+import numpy as np
+import tensorflow as tf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profile_model import build_folded_model, check_parity, layer_flops
+
+
+def _randomize_batch_norm(model):
+    """Give BatchNormalization layers non-trivial statistics"""
+    rng = np.random.default_rng(0)
+    for layer in model.layers:
+        if isinstance(layer, tf.keras.layers.BatchNormalization):
+            layer.set_weights([rng.uniform(0.5, 1.5, w.shape).astype('float32')
+                               if i in (0, 3) else rng.normal(size=w.shape).astype('float32')
+                               for i, w in enumerate(layer.get_weights())])
+
+
+def _small_model():
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(8, 8, 3)),
+        tf.keras.layers.Conv2D(4, 3, padding='same'),
+        tf.keras.layers.BatchNormalization(name='bn_linear'),
+        tf.keras.layers.Conv2D(4, 3, padding='same', activation='relu'),
+        tf.keras.layers.BatchNormalization(name='bn_relu'),
+        tf.keras.layers.MaxPooling2D(),
+        tf.keras.layers.Dropout(0.3),
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(16, activation='relu'),
+        tf.keras.layers.BatchNormalization(name='bn_head'),
+        tf.keras.layers.Dropout(0.5),
+        tf.keras.layers.Dense(10, activation='softmax'),
+    ])
+    _randomize_batch_norm(model)
+    return model
+
+
+def test_folded_model_matches_original():
+    """Folding BatchNormalization and removing Dropout keeps the outputs"""
+    model = _small_model()
+    folded, changes = build_folded_model(model)
+
+    actions = {c["layer"]: c["action"] for c in changes}
+    assert actions["bn_linear"] == "folded"  # after a linear Conv2D
+    assert actions["bn_relu"] == "kept"      # after ReLU, before MaxPooling2D
+    assert actions["bn_head"] == "folded"    # into the following Dense
+    assert [l.name for l in folded.layers
+            if isinstance(l, (tf.keras.layers.Dropout, tf.keras.layers.BatchNormalization))] == ["bn_relu"]
+
+    x = np.random.default_rng(1).random((16, 8, 8, 3), dtype='float32')
+    parity = check_parity(model, folded, x)
+    assert parity["passed"]
+    assert parity["argmax_agreement"] == 1.0
+
+
+def test_layer_flops():
+    """FLOPs count multiply-accumulates twice plus the bias add"""
+    conv = tf.keras.layers.Conv2D(8, 3, padding='same')
+    assert layer_flops(conv, (4, 4, 2), (4, 4, 8)) == 2 * 4 * 4 * 8 * 3 * 3 * 2 + 4 * 4 * 8
+
+    dense = tf.keras.layers.Dense(10)
+    assert layer_flops(dense, (32,), (10,)) == 2 * 32 * 10 + 10
+
+    assert layer_flops(tf.keras.layers.Dropout(0.5), (10,), (10,)) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])